@@ -4,25 +4,58 @@
 Connects to the Java server, registers a name, prints incoming server messages,
 displays BOARD blocks, and allows sending MOVE commands.
 """
+import functools
+import re
+import selectors
 import socket
-import threading
 import sys
 import os
 
 try:
     from colorama import Fore, Back, Style, init as colorama_init
     colorama_init()
+    _COLORIZE_AVAILABLE = True
 except Exception:
     class Dummy:
-        def __getattr__(self, name):
-            return ""
+        # Plain attributes rather than __getattr__, so lookups stay cheap
+        BLACK = RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = ""
+        RESET_ALL = ""
     Fore = Back = Style = Dummy()
+    _COLORIZE_AVAILABLE = False
 
 UNICODE_MAP = {
     'P': '♙', 'R': '♖', 'N': '♘', 'B': '♗', 'Q': '♕', 'K': '♔',
     'p': '♟', 'r': '♜', 'n': '♞', 'b': '♝', 'q': '♛', 'k': '♚'
 }
 
+# ANSI sequences encoded once for the byte-oriented board renderer
+_BG_DARK = Back.BLUE.encode('ascii')
+_BG_LIGHT = Back.WHITE.encode('ascii')
+_FG_LOWER = Fore.YELLOW.encode('ascii')
+_FG_UPPER = Fore.BLACK.encode('ascii')
+_FG_EMPTY = Fore.GREEN.encode('ascii')
+_RESET = Style.RESET_ALL.encode('ascii')
+
+_IS_WIN = os.name == 'nt'
+# Cursor home + erase display: what `clear` itself writes on ANSI terminals
+_CLEAR = b'\x1b[H\x1b[2J'
+
+# Linux only: re-armed after each BOARD so the kernel acks immediately
+_TCP_QUICKACK = getattr(socket, 'TCP_QUICKACK', None)
+
+_FILES = frozenset('abcdefgh')
+_RANKS = frozenset('12345678')
+_COORD2 = frozenset(f + r for f in _FILES for r in _RANKS)
+_MOVE_CHARS = _FILES | _RANKS
+
+# Capture and check/mate symbols, removed in one translate() pass
+_STRIP_TBL = str.maketrans('', '', 'x+#')
+# Undecorated SAN: optional piece, optional disambiguation, destination square
+_SAN_RE = re.compile(
+    r'^(?P<piece>[KQRBNkqrbn])?(?P<disfile>[a-h])?(?P<disrank>[1-8])?'
+    r'(?P<file>[a-h])(?P<rank>[1-8])$'
+)
+
 def parse_algebraic(move_str):
     """Convert algebraic notation like Nc3 or Nbd7 to coordinate notation like b1c3 or b8d7.
     Returns coordinate string or None if unparseable."""
@@ -31,177 +64,470 @@ def parse_algebraic(move_str):
         return None
     
     # Already coordinate notation (e2e4)
-    if len(move_str) >= 4 and move_str[0] in 'abcdefgh' and move_str[1] in '12345678' and move_str[2] in 'abcdefgh':
+    if len(move_str) >= 4 and move_str[:2] in _COORD2 and move_str[2] in _FILES:
         return move_str
     
-    # Remove capture notation and check/mate symbols
-    move_str = move_str.replace('x', '').replace('+', '').replace('#', '').replace('=Q', '').replace('=R', '').replace('=B', '').replace('=N', '')
+    # Remove capture notation and check/mate symbols, then any promotion suffix
+    move_str = move_str.translate(_STRIP_TBL)
+    if len(move_str) >= 2 and move_str[-2] == '=':
+        move_str = move_str[:-2]
+    
+    m = _SAN_RE.match(move_str)
+    if m is None:
+        return None
+    piece, disfile, disrank, file, dest_rank = m.group('piece', 'disfile', 'disrank', 'file', 'rank')
     
     # Pawn moves: e4 or e2e4
-    if len(move_str) == 2 and move_str[0] in 'abcdefgh' and move_str[1] in '12345678':
-        file = move_str[0]
-        dest_rank = move_str[1]
+    if piece is None:
+        if disfile or disrank:
+            return None
         start_rank = '2' if dest_rank in '34' else '7' if dest_rank in '56' else '2'
         return f"{file}{start_rank}{file}{dest_rank}"
     
     # Piece moves: Nc3, Nbd7, Nb1d7, etc.
-    piece_chars = {'K': 'king', 'Q': 'queen', 'R': 'rook', 'B': 'bishop', 'N': 'knight'}
-    if move_str[0].upper() in piece_chars:
-        piece = move_str[0].upper()
-        rest = move_str[1:]
-        
-        # Extract destination (last 2 chars should be file+rank)
-        if len(rest) >= 2 and rest[-2] in 'abcdefgh' and rest[-1] in '12345678':
-            dest = rest[-2:]
-            disambig = rest[:-2] if len(rest) > 2 else ''
-            
-            # If we have full disambiguation (like b1 in Nb1c3)
-            if len(disambig) == 2 and disambig[0] in 'abcdefgh' and disambig[1] in '12345678':
-                return disambig + dest
-            
-            # Partial disambiguation or none - we can't determine source without board state
-            # For now, return None and let server handle or user use full notation
-            return None
+    # If we have full disambiguation (like b1 in Nb1c3)
+    if disfile and disrank:
+        return f"{disfile}{disrank}{file}{dest_rank}"
     
+    # Partial disambiguation or none - we can't determine source without board state
+    # For now, return None and let server handle or user use full notation
     return None
 
-def render_board(ascii_lines, use_unicode=True, colorize=True, flip=False):
-    """Render the BOARD block with optional unicode and colored squares.
-    Expects ascii_lines including rank lines and the final file-label line.
-    flip: if True, render from black's perspective (rank 1 at top)
-    Returns a string ready to print."""
-    out_lines = []
+def _format_cell(piece, dark, use_unicode, colorize):
+    """Format one board square (a one-byte piece as sent by the server) as UTF-8 bytes."""
+    # Empty space instead of dot
+    if piece == b'.':
+        symbol = b' '
+    elif use_unicode:
+        char = piece.decode('ascii', 'replace')
+        symbol = UNICODE_MAP.get(char, char).encode('utf-8')
+    else:
+        symbol = piece
+    if not colorize:
+        return b' ' + symbol + b' '
+    bg = _BG_DARK if dark else _BG_LIGHT
+    fg = _FG_LOWER if piece.islower() else _FG_UPPER if piece != b'.' else _FG_EMPTY
+    return bg + fg + b' ' + symbol + b' ' + _RESET
+
+# Every square the server can send, pre-formatted: _CELLS[use_unicode, colorize][piece, dark]
+_CELLS = {
+    (use_unicode, colorize): {
+        (piece, dark): _format_cell(piece, dark, use_unicode, colorize)
+        for piece in [p.encode('ascii') for p in UNICODE_MAP] + [b'.'] for dark in (0, 1)
+    }
+    for use_unicode in (True, False) for colorize in (True, False)
+}
+
+@functools.lru_cache(maxsize=4096)
+def _render_row(rank, pieces, flip, use_unicode, colorize):
+    """Render one board rank (raw server bytes, pieces as 8 one-byte cells) as UTF-8.
+    Cached, since most ranks are unchanged between consecutive boards."""
+    cells = _CELLS[use_unicode, colorize]
+    if flip:
+        pieces = pieces[::-1]
     
+    # Determine square color (a1 dark). Our ranks are top to bottom; convert rank to int.
+    try:
+        rank_num = int(rank)
+    except ValueError:
+        rank_num = 0
+    # Dark if (file_index + rank_number) % 2 == 1; flipping mirrors the files, which swaps parity
+    row_parity = (rank_num + flip) & 1
+    
+    rendered_row = []
+    for file_index, piece in enumerate(pieces):
+        dark = (file_index & 1) ^ row_parity
+        cell = cells.get((piece, dark))
+        if cell is None:
+            cell = _format_cell(piece, dark, use_unicode, colorize)
+        rendered_row.append(cell)
+    return rank + b' ' + b''.join(rendered_row)
+
+def _parse_board(lines):
+    """Split the raw BOARD lines into ([(rank, pieces), ...], file_labels), staying in bytes.
+    pieces is a tuple so rows can be used directly as _render_row cache keys."""
     # Separate board lines from file labels
-    board_rows = ascii_lines[:-1] if len(ascii_lines) == 9 else ascii_lines
-    file_labels = ascii_lines[-1] if len(ascii_lines) == 9 else '  a b c d e f g h'
+    board_lines = lines[:-1] if len(lines) == 9 else lines
+    file_labels = lines[-1] if len(lines) == 9 else None
+    rows = []
+    for line in board_lines:
+        parts = line.split()
+        rows.append((parts[0] if parts else b'', tuple(parts[1:])))
+    return rows, file_labels
+
+def render_board(rows, file_labels=None, use_unicode=True, colorize=True, flip=False, out=None):
+    """Render the BOARD block with optional unicode and colored squares.
+    Expects rows as returned by _parse_board and the raw file-label line, if any.
+    flip: if True, render from black's perspective (rank 1 at top)
+    out: optional bytearray to append to.
+    Returns a bytearray of UTF-8 lines, each ending in a newline, ready for one write."""
+    if out is None:
+        out = bytearray()
+    if not _COLORIZE_AVAILABLE:
+        colorize = False  # colour codes would all be empty anyway
     
     # Reverse if viewing from black's perspective
     if flip:
-        board_rows = list(reversed(board_rows))
+        rows = rows[::-1]
     
-    for raw in board_rows:
-        parts = raw.split()
-        if len(parts) < 9:
-            out_lines.append(raw)  # fallback
-            continue
-        rank = parts[0]
-        pieces = parts[1:]
-        
-        # Reverse pieces if flipped
-        if flip:
-            pieces = list(reversed(pieces))
-        
-        rendered_row = []
-        for file_index, piece in enumerate(pieces):
-            # Determine square color (a1 dark). Our ranks are top to bottom; convert rank to int.
-            # Dark if (file_index + rank_number) % 2 == 1
-            try:
-                rank_num = int(rank)
-            except ValueError:
-                rank_num = 0
-            
-            # Adjust file_index if flipped for correct coloring
-            actual_file = (7 - file_index) if flip else file_index
-            dark = (actual_file + rank_num) % 2 == 1
-            cell_bg = Back.BLUE if dark else Back.WHITE if colorize else ''
-            fg = Fore.YELLOW if piece.islower() else Fore.BLACK if piece != '.' else Fore.GREEN
-            symbol = piece
-            if use_unicode and piece in UNICODE_MAP:
-                symbol = UNICODE_MAP[piece]
-            elif piece == '.':
-                symbol = ' '  # Empty space instead of dot
-            cell = f"{cell_bg}{fg} {symbol} {Style.RESET_ALL if colorize else ''}" if colorize else f" {symbol} "
-            rendered_row.append(cell)
-        out_lines.append(rank + ' ' + ''.join(rendered_row))
+    for rank, pieces in rows:
+        if len(pieces) < 8:
+            out += b' '.join((rank,) + pieces)  # fallback
+        else:
+            out += _render_row(rank, pieces, flip, use_unicode, colorize)
+        out += b'\n'
     
     # Add file labels (reversed if flipped)
     if flip:
-        out_lines.append('  h g f e d c b a')
+        out += b'  h g f e d c b a\n'
     else:
-        out_lines.append(file_labels if file_labels.strip() else '  a b c d e f g h')
+        out += (file_labels if file_labels and file_labels.strip() else b'  a b c d e f g h') + b'\n'
     
-    return '\n'.join(out_lines)
+    return out
 
 
-def read_loop(sock_file, stop_event, name, state):
-    """Read lines from server and print, handling BOARD blocks."""
-    try:
-        while not stop_event.is_set():
-            line = sock_file.readline()
-            if not line:
-                print(Fore.YELLOW + "[connection closed by server]" + Style.RESET_ALL)
-                stop_event.set()
-                break
-            line = line.rstrip("\n\r")
-            if line == "BOARD":
-                # Clear screen before showing board
-                os.system('clear' if os.name != 'nt' else 'cls')
-                
-                # read next 9 lines (8 ranks + file labels)
-                board_lines = []
+def _colored_board(board_lines, state):
+    """Render raw BOARD lines as coloured unicode bytes from this player's side."""
+    rows, file_labels = _parse_board(board_lines)
+    # Determine if we should flip (we're black)
+    flip = state.get('player_color') == 'BLACK'
+    return bytes(render_board(rows, file_labels, use_unicode=True, colorize=True, flip=flip))
+
+
+def _emit(data):
+    """Write already-encoded output to the terminal in a single write. When
+    colorama has wrapped stdout (Windows console, piped output) the text goes
+    through its wrapper so escape codes are converted or stripped."""
+    out = sys.stdout
+    if out is not sys.__stdout__:
+        out.write(data.decode('utf-8', 'replace'))
+        out.flush()
+        return
+    out.flush()  # keep ordering with anything print() has buffered
+    out.buffer.write(data)
+    out.buffer.flush()
+
+
+# Chosen once at import; the escape goes through _emit like all other output, except
+# on Windows without colorama where nothing would translate it for the console
+if _IS_WIN and not _COLORIZE_AVAILABLE:
+    def _clear_screen():
+        os.system('cls')
+else:
+    def _clear_screen():
+        _emit(_CLEAR)
+
+
+def _open_stdin():
+    """Return (selectable, read) for raw stdin bytes; read() returns b'' at EOF.
+    Windows can only select() on sockets, so there a helper thread relays the
+    console through a socket pair."""
+    if not _IS_WIN:
+        fd = sys.stdin.fileno()
+        return fd, functools.partial(os.read, fd, 4096)
+    return _relay_stdin(sys.stdin.buffer.readline)
+
+
+def _relay_stdin(read):
+    """Feed read() through a socket pair from a helper thread, for stdin the
+    selector can't watch directly (Windows consoles, regular files)."""
+    import threading
+    rsock, wsock = socket.socketpair()
+
+    def relay():
+        try:
+            for chunk in iter(read, b''):
+                wsock.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            wsock.close()
+
+    threading.Thread(target=relay, daemon=True).start()
+    return rsock, functools.partial(rsock.recv, 4096)
+
+
+def _prompt(text, read, buf):
+    """input() replacement that reads through the event loop's raw stdin buffer,
+    so lines typed or piped ahead of the prompts stay queued for the game."""
+    print(text, end="", flush=True)
+    nl = buf.find(b"\n")
+    while nl < 0:
+        chunk = read()
+        if not chunk:
+            if not buf:
+                raise EOFError
+            nl = len(buf)
+            buf += b"\n"
+            break
+        buf += chunk
+        nl = buf.find(b"\n")
+    line = buf[:nl].decode('utf-8', 'replace')
+    del buf[:nl + 1]
+    return line
+
+
+# Fixed message text, coloured and encoded once; server payloads are appended as raw bytes
+_MSG_ROOM_KEY = (Fore.CYAN + "\n[room created]" + Style.RESET_ALL + "\n" + Fore.CYAN + "  key: ").encode('utf-8')
+_MSG_ROOM_SHARE = (Style.RESET_ALL + "\n" + Fore.CYAN + "  share with: python3 client.py --name <yourname> --room ").encode('utf-8')
+_MSG_ROOM_END = ("\n" + Style.RESET_ALL + "\n").encode('utf-8')
+_TAG_QUEUED = (Fore.YELLOW + "[queued]" + Style.RESET_ALL + " ").encode('utf-8')
+_TAG_EXPIRED = (Fore.YELLOW + "[room expired] ").encode('utf-8')
+_TAG_CANCELLED = (Fore.YELLOW + "[room cancelled] ").encode('utf-8')
+_TAG_START = (Fore.CYAN + "[match started]" + Style.RESET_ALL + " START ").encode('utf-8')
+_TAG_YOURMOVE = (Fore.GREEN + "[your move]" + Style.RESET_ALL + "\n").encode('utf-8')
+_TAG_OPP = (Fore.MAGENTA + "[opponent]" + Style.RESET_ALL + " ").encode('utf-8')
+_TAG_ERROR = (Fore.RED + "[error]" + Style.RESET_ALL + " ").encode('utf-8')
+_TAG_END = (Fore.YELLOW + "[game ended]" + Style.RESET_ALL + " ").encode('utf-8')
+_RESET_NL = (Style.RESET_ALL + "\n").encode('utf-8')
+_MSG_CLOSED = (Fore.YELLOW + "[connection closed by server]" + Style.RESET_ALL + "\n").encode('utf-8')
+_MSG_ASCII = (Fore.YELLOW + '[display] switched to plain ASCII' + Style.RESET_ALL + "\n").encode('utf-8')
+_MSG_UNICODE = (Fore.YELLOW + '[display] switched to colored unicode' + Style.RESET_ALL + "\n").encode('utf-8')
+_MSG_NO_BOARD = b'[no board yet]\n'
+_MSG_HINT = (Fore.YELLOW + "[hint] Use full notation: e2e4 or with piece: Nb1c3" + Style.RESET_ALL + "\n").encode('utf-8')
+
+
+def _on_room(key, state):
+    _emit(_MSG_ROOM_KEY + key + _MSG_ROOM_SHARE + key + _MSG_ROOM_END)
+
+
+def _on_queue(rest, state):
+    _emit(_TAG_QUEUED + rest + b"\n")
+
+
+def _on_expired(key, state):
+    _emit(_TAG_EXPIRED + key + _RESET_NL)
+
+
+def _on_cancelled(key, state):
+    _emit(_TAG_CANCELLED + key + _RESET_NL)
+
+
+def _on_start(rest, state):
+    # Extract color (START WHITE opponent or START BLACK opponent)
+    parts = rest.split()
+    if parts:
+        state['player_color'] = parts[0].decode('ascii', 'replace').upper()
+    _emit(_TAG_START + rest + b"\n")
+
+
+def _on_yourmove(rest, state):
+    _emit(_TAG_YOURMOVE)
+
+
+def _on_opp(rest, state):
+    _emit(_TAG_OPP + rest + b"\n")
+
+
+def _on_err(rest, state):
+    _emit(_TAG_ERROR + rest + b"\n")
+
+
+def _on_end(rest, state):
+    _emit(_TAG_END + rest + b"\n")
+    # do not exit immediately; let user decide
+
+
+# Server message tag -> handler(rest_of_line, state); BOARD blocks are handled separately
+_HANDLERS = {
+    b'ROOM': _on_room,
+    b'QUEUE': _on_queue,
+    b'ROOM_EXPIRED': _on_expired,
+    b'CANCELLED': _on_cancelled,
+    b'START': _on_start,
+    b'YOURMOVE': _on_yourmove,
+    b'OPPONENT_MOVE': _on_opp,
+    b'ERROR': _on_err,
+    b'END': _on_end,
+}
+
+
+def _show_board(sock, block, state):
+    """Display one BOARD block: the raw bytes of its 9 lines (8 ranks + file labels)."""
+    if _TCP_QUICKACK is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
+        except OSError:
+            pass
+    # Clear screen before showing board
+    _clear_screen()
+    
+    # Keep the server's plain board alongside the coloured one so display
+    # toggles never have to strip escape codes back out
+    plain = block + b'\n'
+    state['last_board_plain'] = plain
+    if state['ascii_only']:
+        state['last_board_ansi'] = None  # rendered on demand by UNICODE
+        _emit(plain)
+    else:
+        state['last_board_ansi'] = _colored_board(block.split(b'\n'), state)
+        _emit(state['last_board_ansi'])
+
+
+def handle_server_bytes(sock, state):
+    """Receive into the persistent input buffer and handle each complete line.
+    A BOARD block is handled once all of its lines have arrived.
+    Returns False once the server has closed the connection."""
+    buf = state['inbuf']
+    head = state['in_head']
+    tail = state['in_tail']
+    if tail == len(buf):
+        # No room left: drop what has been consumed, or grow for an oversized line
+        if head:
+            buf[:tail - head] = buf[head:tail]
+            tail -= head
+            head = 0
+        else:
+            buf.extend(bytes(len(buf)))
+    with memoryview(buf) as view:
+        n = sock.recv_into(view[tail:])
+        if not n:
+            _emit(_MSG_CLOSED)
+            return False
+        tail += n
+        nl = buf.find(b"\n", head, tail)
+        while nl >= 0:
+            line = bytes(view[head:nl]).rstrip(b"\r")
+            if line == b"BOARD":
+                # find the end of the next 9 lines (8 ranks + file labels)
+                end = nl
                 for _ in range(9):
-                    l = sock_file.readline()
-                    if not l:
+                    end = buf.find(b"\n", end + 1, tail)
+                    if end < 0:
                         break
-                    board_lines.append(l.rstrip("\n\r"))
-                
-                # Determine if we should flip (we're black)
-                flip = state.get('player_color') == 'BLACK'
-                
-                if state['ascii_only']:
-                    rendered = '\n'.join(board_lines)
-                else:
-                    rendered = render_board(board_lines, use_unicode=True, colorize=True, flip=flip)
-                state['last_board'] = rendered
-                print(rendered)
-                continue
-            if line.startswith("ROOM "):
-                key = line.split(" ", 1)[1]
-                print(Fore.CYAN + "\n[room created]" + Style.RESET_ALL)
-                print(Fore.CYAN + f"  key: {key}" + Style.RESET_ALL)
-                print(Fore.CYAN + f"  share with: python3 client.py --name <yourname> --room {key}\n" + Style.RESET_ALL)
-                continue
-            if line.startswith("QUEUE "):
-                print(Fore.YELLOW + "[queued]" + Style.RESET_ALL, line[6:])
-                continue
-            if line.startswith("ROOM_EXPIRED "):
-                key = line.split(" ", 1)[1]
-                print(Fore.YELLOW + f"[room expired] {key}" + Style.RESET_ALL)
-                continue
-            if line.startswith("CANCELLED "):
-                key = line.split(" ", 1)[1]
-                print(Fore.YELLOW + f"[room cancelled] {key}" + Style.RESET_ALL)
-                continue
-            # print other messages with small formatting
-            if line.startswith("START "):
-                # Extract color (START WHITE opponent or START BLACK opponent)
-                parts = line.split()
-                if len(parts) >= 2:
-                    state['player_color'] = parts[1].upper()
-                print(Fore.CYAN + "[match started]" + Style.RESET_ALL, line)
-            elif line == "YOURMOVE":
-                print(Fore.GREEN + "[your move]" + Style.RESET_ALL)
-            elif line.startswith("OPPONENT_MOVE "):
-                print(Fore.MAGENTA + "[opponent]" + Style.RESET_ALL, line[len("OPPONENT_MOVE "):])
-            elif line.startswith("ERROR "):
-                print(Fore.RED + "[error]" + Style.RESET_ALL, line[len("ERROR "):])
-            elif line.startswith("END "):
-                print(Fore.YELLOW + "[game ended]" + Style.RESET_ALL, line[len("END "):])
-                # do not exit immediately; let user decide
+                if end < 0:
+                    break  # block still incomplete; keep BOARD buffered until more arrives
+                _show_board(sock, bytes(view[nl + 1:end]).replace(b"\r", b""), state)
+                head = end + 1
             else:
-                print(line)
+                handle_server_line(line, state)
+                head = nl + 1
+            nl = buf.find(b"\n", head, tail)
+    # Slide unconsumed bytes to the front once more than half the data is spent
+    if head > tail // 2:
+        buf[:tail - head] = buf[head:tail]
+        tail -= head
+        head = 0
+    state['in_head'] = head
+    state['in_tail'] = tail
+    return True
+
+
+def handle_server_line(line, state):
+    """Print one server line; handlers receive the payload as raw bytes."""
+    tag, _, rest = line.partition(b' ')
+    handler = _HANDLERS.get(tag)
+    if handler:
+        handler(rest, state)
+    else:
+        _emit(line + b"\n")
+
+
+def _send_command(send, cmd):
+    """Send one command line to the server. Returns False if the socket is gone."""
+    try:
+        send(cmd + "\n")
     except Exception as e:
-        if not stop_event.is_set():
-            print(Fore.RED + "[read loop error]" + Style.RESET_ALL, e)
-            stop_event.set()
+        print(Fore.RED + "Send failed:" + Style.RESET_ALL, e)
+        return False
+    return True
+
+
+def _cmd_quit(state, send):
+    return False
+
+
+def _cmd_forfeit(state, send):
+    return _send_command(send, 'FF')
+
+
+def _cmd_ascii(state, send):
+    state['ascii_only'] = True
+    _render_row.cache_clear()  # coloured rows are not needed in ASCII mode
+    _emit(_MSG_ASCII)
+    if state['last_board_plain']:
+        _emit(state['last_board_plain'])
+    return True
+
+
+def _cmd_unicode(state, send):
+    state['ascii_only'] = False
+    _emit(_MSG_UNICODE)
+    plain = state['last_board_plain']
+    if plain:
+        if state['last_board_ansi'] is None:
+            # last board arrived in ASCII mode; render it from the stored server lines
+            state['last_board_ansi'] = _colored_board(plain.splitlines(), state)
+        _emit(state['last_board_ansi'])
+    return True
+
+
+def _cmd_redraw(state, send):
+    board = state['last_board_plain'] if state['ascii_only'] else state['last_board_ansi']
+    if board:
+        _emit(board)
+    else:
+        _emit(_MSG_NO_BOARD)
+    return True
+
+
+# Lower-cased user command -> handler(state, send); returns False to exit
+_COMMANDS = {
+    'quit': _cmd_quit,
+    'exit': _cmd_quit,
+    'ff': _cmd_forfeit,
+    'forfeit': _cmd_forfeit,
+    'ascii': _cmd_ascii,
+    'unicode': _cmd_unicode,
+    'redraw': _cmd_redraw,
+}
+
+
+def handle_stdin_line(line, state, send):
+    """Handle one line typed by the user. Returns False when the client should exit."""
+    line = line.strip()
+    if not line:
+        return True
+    low = line.lower()
+    command = _COMMANDS.get(low)
+    if command:
+        return command(state, send)
+    cmd = line
+    head = line[:5].upper()
+    if head != "MOVE " and head != "NAME ":
+        # Try to parse as algebraic or coordinate notation
+        parsed = parse_algebraic(line)
+        if parsed:
+            cmd = f"MOVE {parsed}"
+        else:
+            # If can't parse and looks like a move attempt, send as-is and let server reject
+            if not _MOVE_CHARS.isdisjoint(low):
+                _emit(_MSG_HINT)
+    return _send_command(send, cmd)
+
+
+def handle_stdin_buffer(buf, state, send):
+    """Handle every complete line in buf, leaving any partial line behind.
+    Returns False once a command asks to exit."""
+    nl = buf.find(b"\n")
+    while nl >= 0:
+        line = buf[:nl].decode('utf-8', 'replace')
+        del buf[:nl + 1]
+        if not handle_stdin_line(line, state, send):
+            return False
+        nl = buf.find(b"\n")
+    return True
 
 
 def main():
     print(Fore.CYAN + "=== Terminal Chess ===" + Style.RESET_ALL)
+
+    # stdin is read raw from here on; the prompts share the event loop's buffer
+    stdin_src, read_stdin = _open_stdin()
+    stdin_buf = bytearray()
     
     # Get player name
-    name = input("Enter your name: ").strip()
+    name = _prompt("Enter your name: ", read_stdin, stdin_buf).strip()
     if not name:
         name = "Player"
     
@@ -212,7 +538,7 @@ def main():
     print("  3. Join private room")
     print("  4. Play against computer")
     
-    mode = input("Choose mode (1/2/3/4) [1]: ").strip()
+    mode = _prompt("Choose mode (1/2/3/4) [1]: ", read_stdin, stdin_buf).strip()
     if not mode:
         mode = "1"
     
@@ -221,10 +547,10 @@ def main():
     play_computer = False
     
     if mode == "2":
-        custom_key = input("Enter room key (leave empty for random): ").strip()
+        custom_key = _prompt("Enter room key (leave empty for random): ", read_stdin, stdin_buf).strip()
         create_room = custom_key if custom_key else 'auto'
     elif mode == "3":
-        room_key = input("Enter room key: ").strip()
+        room_key = _prompt("Enter room key: ", read_stdin, stdin_buf).strip()
         if not room_key:
             print(Fore.RED + "Room key required!" + Style.RESET_ALL)
             sys.exit(1)
@@ -235,7 +561,6 @@ def main():
     
     host = "localhost"
     port = 5000
-    stop_event = threading.Event()
 
     try:
         s = socket.create_connection((host, port))
@@ -243,91 +568,72 @@ def main():
         print(Fore.RED + "Failed to connect:" + Style.RESET_ALL, e)
         sys.exit(1)
 
-    sock_file = s.makefile("r")
-    sock_out = s.makefile("w")
+    # Per-connection tuning: no Nagle delay on small MOVE writes, larger kernel buffers
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 262144)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 65536)
 
-    # start reader thread
-    state = {'last_board': None, 'ascii_only': False}
-    reader = threading.Thread(target=read_loop, args=(sock_file, stop_event, name, state), daemon=True)
-    reader.start()
+    def send(data):
+        s.sendall(data if isinstance(data, bytes) else data.encode('utf-8'))
 
-    # send name registration
-    sock_out.write(f"NAME {name}\n")
-    sock_out.flush()
+    state = {'last_board_ansi': None, 'last_board_plain': None, 'ascii_only': False, 'inbuf': bytearray(65536), 'in_head': 0, 'in_tail': 0}
 
-    # send game mode command
+    # game mode command
     if room_key:
-        sock_out.write(f"JOIN {room_key}\n")
-        sock_out.flush()
+        mode_cmd = b"JOIN " + room_key.encode('utf-8')
     elif create_room:
         if create_room == 'auto':
-            sock_out.write("CREATE\n")
+            mode_cmd = b"CREATE"
         else:
-            sock_out.write(f"CREATE {create_room}\n")
-        sock_out.flush()
+            mode_cmd = b"CREATE " + create_room.encode('utf-8')
     elif play_computer:
-        sock_out.write("COMPUTER\n")
-        sock_out.flush()
+        mode_cmd = b"COMPUTER"
     else:
-        sock_out.write("FIND\n")
-        sock_out.flush()
+        mode_cmd = b"FIND"
+
+    # send name registration and game mode in a single write
+    send(b"NAME " + name.encode('utf-8') + b"\n" + mode_cmd + b"\n")
+
+    # Single-threaded event loop: serve whichever of the socket and stdin is ready
+    sel = selectors.DefaultSelector()
+    running = True
 
     try:
-        while not stop_event.is_set():
-            try:
-                line = input().strip()
-            except EOFError:
-                break
-            if not line:
-                continue
-            cmd = line
-            if line.lower() in ("quit", "exit"):
-                break
-            if line.lower() in ('ff', 'forfeit'):
-                cmd = 'FF'
-            elif line.lower() == 'ascii':
-                state['ascii_only'] = True
-                print(Fore.YELLOW + '[display] switched to plain ASCII' + Style.RESET_ALL)
-                if state['last_board']:
-                    print(state['last_board'].replace('\x1b', ''))  # crude strip if colored
-                continue
-            if line.lower() == 'unicode':
-                state['ascii_only'] = False
-                print(Fore.YELLOW + '[display] switched to colored unicode' + Style.RESET_ALL)
-                if state['last_board']:
-                    # re-render from stored ascii? We only stored rendered version; skip
-                    print(state['last_board'])
-                continue
-            if line.lower() == 'redraw':
-                if state['last_board']:
-                    print(state['last_board'])
-                else:
-                    print('[no board yet]')
-                continue
-            if not (line.upper().startswith("MOVE ") or line.upper().startswith("NAME ") or line.upper() == 'FF'):
-                # Try to parse as algebraic or coordinate notation
-                parsed = parse_algebraic(line)
-                if parsed:
-                    cmd = f"MOVE {parsed}"
+        sel.register(s, selectors.EVENT_READ)
+        try:
+            sel.register(stdin_src, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            # e.g. epoll refuses regular files redirected with < file
+            stdin_src, read_stdin = _relay_stdin(read_stdin)
+            sel.register(stdin_src, selectors.EVENT_READ)
+        # moves that arrived along with the prompt answers go out first
+        running = handle_stdin_buffer(stdin_buf, state, send)
+        while running:
+            for key, _ in sel.select():
+                if key.fileobj is s:
+                    try:
+                        running = handle_server_bytes(s, state)
+                    except Exception as e:
+                        print(Fore.RED + "[read loop error]" + Style.RESET_ALL, e)
+                        running = False
                 else:
-                    # If can't parse and looks like a move attempt, send as-is and let server reject
-                    if any(c in line.lower() for c in 'abcdefgh12345678'):
-                        print(Fore.YELLOW + "[hint] Use full notation: e2e4 or with piece: Nb1c3" + Style.RESET_ALL)
-            # send command
-            try:
-                sock_out.write(cmd + "\n")
-                sock_out.flush()
-            except Exception as e:
-                print(Fore.RED + "Send failed:" + Style.RESET_ALL, e)
-                break
+                    chunk = read_stdin()
+                    if chunk:
+                        stdin_buf += chunk
+                    elif stdin_buf:
+                        stdin_buf += b"\n"  # unterminated last line still counts, as with input()
+                    running = handle_stdin_buffer(stdin_buf, state, send)
+                    if not chunk:
+                        running = False
+                if not running:
+                    break
 
     except KeyboardInterrupt:
         pass
     finally:
-        stop_event.set()
+        sel.close()
         try:
-            sock_out.write("QUIT\n")
-            sock_out.flush()
+            send(b"QUIT\n")
         except Exception:
             pass
         try: